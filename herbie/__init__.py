@@ -95,6 +95,7 @@ default_toml = f"""# Herbie defaults
 model = "hrrr"
 fxx = 0
 save_dir = "{_save_dir}"
+cache_dir = "~/.cache/herbie"
 overwrite = false
 verbose = true
 
@@ -191,6 +192,12 @@ except Exception:
 # Expand the full path for `save_dir`
 config["default"]["save_dir"] = Path(config["default"]["save_dir"]).expand()
 
+# Expand the full path for `cache_dir` (config files made by older versions
+# of Herbie don't have this key).
+config["default"]["cache_dir"] = Path(
+    config["default"].get("cache_dir", "~/.cache/herbie")
+).expand()
+
 if os.getenv("HERBIE_SAVE_DIR"):
     config["default"]["save_dir"] = Path(os.getenv("HERBIE_SAVE_DIR")).expand()
     print(
@@ -20,7 +20,6 @@ from io import StringIO
 from shutil import which
 from typing import Literal, Optional, Union
 
-import cfgrib
 import pandas as pd
 import requests
 import xarray as xr
@@ -382,6 +381,13 @@ class Herbie:
             providing this right (see #114). I decreased to 10 and
             essentially turned off this check.
         """
+        # Some model templates cache the HEAD response (e.g., AQM files
+        # hold all forecast hours, so the same file is checked repeatedly).
+        template = getattr(model_templates, self.model)
+        if hasattr(template, "_head") and url == self.SOURCES.get("aws"):
+            head = template._head(self)
+            return head is not None and head[0] > min_content_length
+
         head = requests.head(url)
         check_exists = head.ok
         if check_exists and "Content-Length" in head.raw.info():
@@ -1143,6 +1149,10 @@ class Herbie:
         )
         backend_kwargs.setdefault("errors", "raise")
 
+        # cfgrib (and the ecCodes library) is only imported when it is
+        # needed, because it is slow to import.
+        import cfgrib
+
         # Use cfgrib.open_datasets, just in case there are multiple "hypercubes"
         # for what we requested.
         Hxr = cfgrib.open_datasets(
@@ -42,39 +42,186 @@ References:
 - https://vlab.noaa.gov/web/osti-modeling/air-quality
 """
 
-import warnings
-import re
+__all__ = ["aqm"]
+
+import contextlib
+import hashlib
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import MappingProxyType
+
+import requests
+
+from herbie import Path, config
+
+log = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is not available on Windows; index files are not locked there.
+    fcntl = None
+
+_AQM_BUCKET_URL = "https://noaa-nws-naqfc-pds.s3.amazonaws.com"
+
+# Operational AQM versions and the dates each new version started.
+# Before July 20, 2021 was AQMv5
+# July 20, 2021 to May 13, 2024 was AQMv6
+# Starting May 14, 2024, AQMv7 became operational
+_AQM_VERSIONS = ("v5", "v6", "v7")
+_AQM_VERSION_CUTOVERS = (datetime(2021, 7, 20), datetime(2024, 5, 14))
+
+# cfgrib index files are kept here so they can be reused between sessions
+# instead of being rebuilt (a full scan of the GRIB file) on every open.
+# Cached byte ranges (see `aqm.USE_FILECACHE`) are kept here too.
+_CACHE_DIR = config["default"]["cache_dir"]
+
+
+def _indexpath(file_path, backend_kwargs):
+    """
+    Return a persistent cfgrib index path for a GRIB file and backend_kwargs.
+
+    cfgrib never overwrites an index file, so the name changes when the
+    file is downloaded again or opened with different arguments. cfgrib
+    fills in ``{short_hash}`` from the keys it indexes.
+    """
+    stat = os.stat(file_path)
+    kwargs = sorted((k, v) for k, v in backend_kwargs.items() if k != "indexpath")
+    key = f"{file_path}:{stat.st_mtime_ns}:{stat.st_size}:{kwargs!r}"
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return str(_CACHE_DIR / f"{digest}.{{short_hash}}.idx")
+
+
+@contextlib.contextmanager
+def _index_lock(indexpath):
+    """
+    Prevent concurrent processes from writing the same index file.
+
+    Each index has its own lock file, so different GRIB files are opened
+    concurrently. The lock file is removed when the lock is released.
+    """
+    if not indexpath:
+        # cfgrib won't write an index file.
+        yield
+        return
+    indexpath = Path(indexpath)
+    indexpath.parent.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+
+    lock_path = indexpath.with_name(f"{indexpath.name.split('.')[0]}.lock")
+    while True:
+        lock = open(lock_path, "w")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # The previous holder may have removed the lock file after it was
+        # opened here; if so, lock the new file instead.
+        try:
+            if os.stat(lock_path).st_ino == os.fstat(lock.fileno()).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        lock.close()
+
+    try:
+        yield
+    finally:
+        os.unlink(lock_path)
+        lock.close()
+
+
+# RAM-backed filesystem (Linux) for GRIB messages that won't be kept.
+_SHM_DIR = Path("/dev/shm")
+
+
+def _fits_in_shm(size):
+    """Check that a file of ``size`` bytes fits in /dev/shm."""
+    return _SHM_DIR.is_dir() and shutil.disk_usage(_SHM_DIR).free > size
+
+
+def _offset_for_record(idx_path, record_number):
+    """Return the byte offset of a GRIB message from a local wgrib2-style index file."""
+    with open(idx_path) as f:
+        lines = f.read().splitlines()
+
+    # Each line looks like "1:0:d=2025041512:OZMAX8:1 sigma level:..."
+    for line in lines:
+        if not line.strip():
+            continue
+        message, offset, _ = line.split(":", 2)
+        if message == str(record_number):
+            return int(offset)
+    return None
+
+
+# Lazily-loaded datasets already opened from local AQM files, keyed by
+# (path, modification time, backend_kwargs). Opening the same file again
+# (e.g., for each forecast hour) returns a copy instead of making cfgrib
+# read the GRIB messages again.
+_DS_CACHE = {}
+_DS_CACHE_SIZE = 8
+# FastHerbie threads open datasets at the same time.
+_DS_CACHE_LOCK = threading.Lock()
+
+
+def _open_dataset(local_file, backend_kwargs):
+    """Open a local GRIB file with cfgrib, reusing a cached dataset if possible."""
+    import xarray as xr
+
+    local_file = str(local_file)
+    mtime = os.stat(local_file).st_mtime
+    key = (local_file, mtime, repr(sorted(backend_kwargs.items())))
+
+    with _DS_CACHE_LOCK:
+        ds = _DS_CACHE.get(key)
+    if ds is None:
+        # The cache isn't locked while the file is opened, so other files
+        # can be opened at the same time.
+        with _index_lock(backend_kwargs["indexpath"]):
+            ds = xr.open_dataset(
+                local_file, engine="cfgrib", backend_kwargs=backend_kwargs
+            )
+
+        with _DS_CACHE_LOCK:
+            # Forget datasets opened from an older version of this file.
+            for k in [k for k in _DS_CACHE if k[0] == local_file and k[1] != mtime]:
+                del _DS_CACHE[k]
+            if key not in _DS_CACHE and len(_DS_CACHE) >= _DS_CACHE_SIZE:
+                del _DS_CACHE[next(iter(_DS_CACHE))]
+            _DS_CACHE[key] = ds
+
+    return ds.copy()
 
-import xarray as xr
 
 class aqm:
-    def template(self):
-        self.model = "aqm"
-        self.DESCRIPTION = "NOAA Air Quality Model (AQM)"
-        self.DETAILS = {
+    # Every forecast hour of an AQM cycle is in the same file, so one
+    # HEAD request is shared by all Herbie objects for that file.
+    # Keyed by (version, domain, date, product); values are
+    # (Content-Length, ETag).
+    _head_cache: dict[tuple, tuple[int, str]] = {}
+
+    # Set `aqm.USE_FILECACHE = True` to keep the parts of AQM files read by
+    # aqm.xarray in a local cache (requires fsspec and aiohttp). Reading
+    # them again, even in a later session, won't request them from AWS.
+    USE_FILECACHE = False
+
+    # These don't change between Herbie objects, so they are built once
+    # and shared (read-only) by every object instead of each template call.
+    DETAILS = MappingProxyType(
+        {
             "Product description": "https://registry.opendata.aws/noaa-nws-naqfc-pds/",
             "Model documentation": "https://vlab.noaa.gov/web/osti-modeling/air-quality",
         }
-
-        # Set default domain if not provided
-        if not hasattr(self, "domain"):
-            self.domain = "CS"  # Default to CONUS domain
-
-        # Set the model version
-        if not hasattr(self, "version"):
-            # Default to current operational version (v7 as of April 2025)
-            self.version = "v7"
-
-        # Starting May 14, 2024, AQMv7 became operational
-        # July 20, 2021 to May 13, 2024 was AQMv6
-        # Before July 20, 2021 was AQMv5
-        if self.date.year < 2021 or (self.date.year == 2021 and self.date.month < 7):
-            self.version = "v5"
-        elif self.date.year < 2024 or (self.date.year == 2024 and self.date.month < 5) or (self.date.year == 2024 and self.date.month == 5 and self.date.day < 14):
-            self.version = "v6"
-
-        self.PRODUCTS = {
+    )
+    PRODUCTS = MappingProxyType(
+        {
             "ave_1hr_o3": "1-hour average ozone",
             "ave_1hr_o3_bc": "1-hour average ozone (bias-corrected)",
             "ave_8hr_o3": "8-hour average ozone",
@@ -90,28 +237,240 @@ class aqm:
             "max_1hr_pm25": "Maximum 1-hour PM2.5",
             "max_1hr_pm25_bc": "Maximum 1-hour PM2.5 (bias-corrected)",
         }
+    )
+    _VALID_DOMAINS = frozenset({"CS", "AK", "HI"})
+
+    # (variable, units, description) in the GRIB file for each product.
+    # Bias-corrected products ("_bc") have the same variables.
+    _PRODUCT_META = MappingProxyType(
+        {
+            "ave_1hr_o3": ("ozcon", "ppb", "1-hour average ozone"),
+            "ave_8hr_o3": ("ozcon", "ppb", "8-hour average ozone"),
+            "max_1hr_o3": ("OZMAX1", "ppbV", "Maximum 1-hour ozone"),
+            "max_8hr_o3": ("OZMAX8", "ppbV", "Maximum 8-hour ozone"),
+            "ave_1hr_pm25": ("pmtf", "µg/m³", "1-hour average PM2.5"),
+            "ave_24hr_pm25": ("pmtf", "µg/m³", "24-hour average PM2.5"),
+            "max_1hr_pm25": ("PMMAX", "µg/m³", "Maximum PM2.5"),
+        }
+    )
+
+    def template(self):
+        self.model = "aqm"
+        self.DESCRIPTION = "NOAA Air Quality Model (AQM)"
+        self.DETAILS = aqm.DETAILS
+
+        # Set default domain if not provided
+        if not hasattr(self, "domain"):
+            self.domain = "CS"  # Default to CONUS domain
+
+        # Set the model version
+        if not hasattr(self, "version"):
+            # Default to current operational version (v7 as of April 2025)
+            self.version = "v7"
+
+        # Dates before the latest cutover must use the version that was
+        # operational at the time.
+        i = bisect_right(_AQM_VERSION_CUTOVERS, self.date)
+        if i < len(_AQM_VERSION_CUTOVERS):
+            self.version = _AQM_VERSIONS[i]
+
+        self.PRODUCTS = aqm.PRODUCTS
 
         # Validate domain
-        valid_domains = ["CS", "AK", "HI"]
-        if self.domain not in valid_domains:
-            raise ValueError(f"'domain' must be one of {valid_domains}")
-
-        # Define the AWS S3 path - Note AQM files use a fixed "227" identifier
-        # rather than encoding the forecast hour in the filename
-        if self.version == "v7":
-            # AQMv7 path structure
-            s3_path = f"AQMv7/{self.domain}/{self.date:%Y%m%d}/{self.date:%H}/aqm.t{self.date:%H}z.{self.product}.{self.date:%Y%m%d}.227.grib2"
-        else:
-            # AQMv5 and AQMv6 path structure
-            s3_path = f"AQM{self.version}/{self.domain}/{self.date:%Y%m%d}/{self.date:%H}/aqm.t{self.date:%H}z.{self.product}.{self.date:%Y%m%d}.227.grib2"
+        if self.domain not in aqm._VALID_DOMAINS:
+            raise ValueError(f"'domain' must be one of {sorted(aqm._VALID_DOMAINS)}")
 
         self.SOURCES = {
-            "aws": f"https://noaa-nws-naqfc-pds.s3.amazonaws.com/{s3_path}",
+            "aws": f"{_AQM_BUCKET_URL}/{aqm._s3_key(self)}",
         }
 
         self.IDX_SUFFIX = [".idx"]
         self.LOCALFILE = f"{self.get_remoteFileName}"
 
+        # Maximum products need special handling when opened with xarray.
+        # The product is None the first time Herbie calls template(); it
+        # calls template() again once the default product is chosen.
+        self._is_max = "max" in (self.product or "")
+
+    def _s3_key(self):
+        """Return the key of the AQM file in the noaa-nws-naqfc-pds bucket."""
+        ymd = self.date.strftime("%Y%m%d")
+        hh = self.date.strftime("%H")
+        # AQM files use a fixed "227" identifier rather than encoding
+        # the forecast hour in the filename. The path structure is the
+        # same for AQMv5, AQMv6 and AQMv7.
+        return f"AQM{self.version}/{self.domain}/{ymd}/{hh}/aqm.t{hh}z.{self.product}.{ymd}.227.grib2"
+
+    def _head(self):
+        """
+        Return the (Content-Length, ETag) of the AQM file on AWS.
+
+        Returns None if the file does not exist. Missing files are not
+        cached because they might be uploaded later.
+        """
+        key = (self.version, self.domain, self.date, self.product)
+        if key not in aqm._head_cache:
+            # The URL was already built by template(); don't build it again.
+            head = requests.head(self.SOURCES["aws"])
+            if not head.ok:
+                return None
+            aqm._head_cache[key] = (
+                int(head.headers.get("Content-Length", 0)),
+                head.headers.get("ETag", ""),
+            )
+        return aqm._head_cache[key]
+
+    @classmethod
+    def clear_head_cache(cls):
+        """Forget the cached HEAD responses for AQM files."""
+        cls._head_cache.clear()
+
+    @classmethod
+    def gather(cls, objects, max_threads=16):
+        """
+        Download the full AQM files for many Herbie objects concurrently.
+
+        All forecast hours of a cycle are in the same file, so each file
+        is downloaded once, no matter how many objects share it. The
+        ``grib`` attribute of each object is set to the local file so
+        ``download()`` and ``xarray()`` will use it.
+
+        Parameters
+        ----------
+        objects : list of Herbie
+            Herbie objects with ``model="aqm"`` (e.g., ``FastHerbie.objects``).
+        max_threads : int
+            Maximum number of simultaneous downloads.
+
+        Returns
+        -------
+        list of pathlib.Path
+            The local files.
+        """
+        files = {}
+        for H in objects:
+            if H.grib is not None:
+                files.setdefault(H.get_localFilePath(), []).append(H)
+
+        if not files:
+            return []
+
+        session = requests.Session()
+        session.mount(
+            "https://", requests.adapters.HTTPAdapter(pool_maxsize=max_threads)
+        )
+
+        def _fetch(outFile, H):
+            if outFile.exists() and not H.overwrite:
+                return outFile
+            if not str(H.grib).startswith("http"):
+                return Path(H.grib)
+            outFile.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a partial file first so an interrupted download
+            # is never mistaken for a complete local copy.
+            partial = outFile.with_name(f"{outFile.name}.part")
+            try:
+                with session.get(H.grib, stream=True) as r:
+                    r.raise_for_status()
+                    with open(partial, "wb") as f:
+                        for chunk in r.iter_content(chunk_size=1024 * 1024):
+                            f.write(chunk)
+            except Exception:
+                partial.unlink(missing_ok=True)
+                raise
+            partial.replace(outFile)
+            return outFile
+
+        local_files = []
+        with session, ThreadPoolExecutor(min(max_threads, len(files))) as exe:
+            futures = {
+                outFile: exe.submit(_fetch, outFile, Hs[0])
+                for outFile, Hs in files.items()
+            }
+            for outFile, future in futures.items():
+                local_file = future.result()
+                for H in files[outFile]:
+                    H.grib = local_file
+                local_files.append(local_file)
+
+        return local_files
+
+    def _read_cached(self, ranges):
+        """Read (start, end) byte ranges of the remote GRIB file via fsspec."""
+        try:
+            import fsspec
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError(
+                "aqm.USE_FILECACHE requires fsspec and aiohttp; "
+                "try `pip install herbie-data[filecache]`."
+            ) from e
+
+        messages = []
+        with fsspec.open(
+            f"blockcache::{self.grib}",
+            blockcache={"cache_storage": str(_CACHE_DIR / "blockcache")},
+        ) as f:
+            for start, end in ranges:
+                f.seek(start)
+                messages.append(f.read(-1 if end is None else end - start + 1))
+        return messages
+
+    def _open_ranged(self, search, backend_kwargs, max_threads=8):
+        """
+        Open the GRIB messages matching ``search`` without keeping a file.
+
+        The byte range of each group of adjacent messages is read from
+        the index file and requested concurrently from the remote
+        source. The messages are written to a temporary file (in
+        /dev/shm if possible), loaded into memory, and the temporary file
+        is removed.
+        """
+        import xarray as xr
+
+        idx_df = self.inventory(search).copy()
+        if idx_df.empty:
+            raise ValueError(f"No GRIB messages found for {search=}")
+        idx_df["download_groups"] = idx_df.grib_message.diff().ne(1).cumsum()
+
+        ranges = []
+        for _, group in idx_df.groupby("download_groups"):
+            start = int(group.start_byte.min())
+            end = group.end_byte.max(skipna=False)
+            # The last message in the file doesn't have an end byte.
+            ranges.append((start, None if math.isnan(end) else int(end)))
+
+        def _get(byte_range):
+            start, end = byte_range
+            range_header = f"bytes={start}-{'' if end is None else end}"
+            r = requests.get(self.grib, headers={"Range": range_header})
+            r.raise_for_status()
+            return r.content
+
+        if aqm.USE_FILECACHE:
+            messages = aqm._read_cached(self, ranges)
+        else:
+            with ThreadPoolExecutor(min(max_threads, len(ranges))) as exe:
+                messages = list(exe.map(_get, ranges))
+
+        # Write the messages to RAM (/dev/shm) if there is room, so cfgrib
+        # doesn't read them from a slow disk.
+        size = sum(len(message) for message in messages)
+        tmp_dir = _SHM_DIR if _fits_in_shm(size) else None
+        with tempfile.NamedTemporaryFile(
+            suffix=".grib2", dir=tmp_dir, delete=False
+        ) as f:
+            for message in messages:
+                f.write(message)
+        try:
+            with xr.open_dataset(
+                f.name,
+                engine="cfgrib",
+                backend_kwargs={**backend_kwargs, "indexpath": ""},
+            ) as ds:
+                return ds.load()
+        finally:
+            os.unlink(f.name)
+
     def xarray(self, search=None, backend_kwargs=None, remove_grib=True, **download_kwargs):
         """
         Override the default xarray method to handle AQM maximum products.
@@ -120,16 +479,16 @@ class aqm:
         - fxx=0 : first window (index 0)
         - fxx=1 : second window (index 1)
         - fxx=2+ : third window (index 2, or last available)
+
+        ``Herbie.xarray`` does not call this method; call it explicitly
+        with ``aqm.xarray(H, search)``.
         """
         # Set default backend kwargs if not provided
         if backend_kwargs is None:
             backend_kwargs = {}
 
-        # Download the file if needed
-        local_file = self.download(search, **download_kwargs)
-
         # For maximum products, disable time handling completely
-        if "max" in self.product:
+        if self._is_max:
             # Completely disable time handling
             backend_kwargs["decode_times"] = False
             backend_kwargs["filter_by_keys"] = {"typeOfLevel": "surface"}
@@ -137,17 +496,33 @@ class aqm:
             # Additional settings to avoid time conversion issues
             backend_kwargs["time_dims"] = []  # Avoid treating any dimension as time
 
-            # Open the dataset with time handling disabled
-            ds = xr.open_dataset(
-                local_file,
-                engine="cfgrib",
-                backend_kwargs=backend_kwargs
-            )
+            if (
+                search is not None
+                and remove_grib
+                and self.idx is not None
+                and str(self.grib).startswith("http")
+                and not self.get_localFilePath(search).exists()
+            ):
+                # The GRIB file won't be kept, so only fetch the
+                # requested messages instead of downloading a subset.
+                ds = aqm._open_ranged(self, search, backend_kwargs)
+            else:
+                # Download the file if needed
+                local_file = self.download(search, **download_kwargs)
+
+                # Reuse the cfgrib index from a previous open of this file
+                backend_kwargs.setdefault(
+                    "indexpath", _indexpath(local_file, backend_kwargs)
+                )
+
+                # Open the dataset with time handling disabled
+                ds = _open_dataset(local_file, backend_kwargs)
 
             # Simple mapping of fxx to window index
-            if "time" in ds.dims and len(ds.time) > 1:
+            n_time = ds.sizes.get("time", 0)
+            if n_time > 1:
                 # Map fxx to time index: 0->0, 1->1, 2+->2 (or last index available)
-                time_idx = min(self.fxx, 2, len(ds.time)-1)
+                time_idx = min(self.fxx, 2, n_time - 1)
                 ds = ds.isel(time=time_idx)
                 ds.attrs["time_window"] = int(time_idx)
 
@@ -167,53 +542,53 @@ class aqm:
             )
 
     def _load_specific_grib_record(self, file_path, record_number):
-        """Load a specific GRIB record from a file by message number."""
+        """
+        Load a specific GRIB record from a file by message number.
+
+        Raises an error if the record can't be found or opened.
+        """
         try:
-            import cfgrib
             import xarray as xr
 
-            # Use cfgrib index to get message for the specific record
-            index = cfgrib.index.FileIndex.from_fileindex(
-                file_path,
-                indexpath=file_path + '.idx',
-                filter_by_keys={}
-            )
-
-            # Get all offsets from the index
-            all_offsets = index.index_keys.get('offset', [])
-
-            if not all_offsets:
-                print("No offsets found in index")
-                return None
-
-            # Get the specific offset for this message number
-            message_offset = None
-            for offset, message in index.index_keys.items():
-                if isinstance(message, int) and message == record_number:
-                    message_offset = offset
-                    break
+            # Prefer a local index file (e.g., from `create_index_files`)
+            idx_path = f"{file_path}.idx"
+            if os.path.exists(idx_path):
+                message_offset = _offset_for_record(idx_path, record_number)
+            else:
+                # Herbie's index only has the offsets for the full file,
+                # not for a subset.
+                if Path(file_path).resolve() != self.get_localFilePath().resolve():
+                    raise ValueError(f"No index file found for {file_path}")
+                idx_path = self.idx
+                idx_df = self.index_as_dataframe
+                offsets = idx_df.loc[idx_df.grib_message == record_number, "start_byte"]
+                message_offset = int(offsets.iloc[0]) if len(offsets) else None
 
             if message_offset is None:
-                print(f"Could not find offset for message {record_number}")
-                return None
+                raise ValueError(
+                    f"GRIB message {record_number} is not in the index {idx_path}"
+                )
+
+            backend_kwargs = {
+                "filter_by_keys": {"offset": message_offset},
+                "encode_cf": "parameter",
+                "errors": "ignore",
+                "decode_times": False,  # Turning off time decoding for maximum products
+            }
+            backend_kwargs["indexpath"] = _indexpath(file_path, backend_kwargs)
 
             # Open this message only
-            ds = xr.open_dataset(
-                file_path,
-                engine="cfgrib",
-                backend_kwargs={
-                    "filter_by_keys": {},
-                    "encode_cf": "parameter",
-                    "grib_errors": "ignore",
-                    "decode_times": False,  # Turning off time decoding for maximum products
-                    "indexpath": ""
-                }
-            )
+            with _index_lock(backend_kwargs["indexpath"]):
+                ds = xr.open_dataset(
+                    file_path, engine="cfgrib", backend_kwargs=backend_kwargs
+                )
 
             return ds
         except Exception as e:
-            print(f"Error loading specific GRIB record: {e}")
-            return None
+            log.debug(
+                f"Error loading GRIB record {record_number} from {file_path}: {e}"
+            )
+            raise
 
     def _post_process_dataset(self, ds):
         """Add metadata and custom processing to the dataset."""
@@ -224,40 +599,9 @@ class aqm:
         ds.attrs["version"] = self.version
 
         # Add product-specific metadata
-        if "o3" in self.product:
-            if "max" in self.product:
-                # Look for OZMAX variables in the dataset
-                if "OZMAX1" in ds:
-                    ds.attrs["variable"] = "OZMAX1"
-                    ds.attrs["units"] = "ppbV"
-                    ds.attrs["description"] = "Maximum 1-hour ozone"
-                elif "OZMAX8" in ds:
-                    ds.attrs["variable"] = "OZMAX8"
-                    ds.attrs["units"] = "ppbV"
-                    ds.attrs["description"] = "Maximum 8-hour ozone"
-            else:
-                # For average products, the variable is typically ozcon
-                if "ozcon" in ds:
-                    ds.attrs["variable"] = "ozcon"
-                    ds.attrs["units"] = "ppb"
-                    if "1hr" in self.product:
-                        ds.attrs["description"] = "1-hour average ozone"
-                    else:
-                        ds.attrs["description"] = "8-hour average ozone"
-        elif "pm25" in self.product:
-            if "max" in self.product:
-                if "PMMAX" in ds:
-                    ds.attrs["variable"] = "PMMAX"
-                    ds.attrs["units"] = "µg/m³"
-                    ds.attrs["description"] = "Maximum PM2.5"
-            else:
-                if "pmtf" in ds:
-                    ds.attrs["variable"] = "pmtf"
-                    ds.attrs["units"] = "µg/m³"
-                    if "1hr" in self.product:
-                        ds.attrs["description"] = "1-hour average PM2.5"
-                    else:
-                        ds.attrs["description"] = "24-hour average PM2.5"
+        meta = aqm._PRODUCT_META.get(self.product.removesuffix("_bc"))
+        if meta is not None and meta[0] in ds.data_vars:
+            ds.attrs["variable"], ds.attrs["units"], ds.attrs["description"] = meta
 
         # Document our processing
         ds.attrs["processing"] = f"Processed with Herbie AQM module for forecast hour {self.fxx}"
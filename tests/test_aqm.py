@@ -0,0 +1,419 @@
+"""Tests for the NOAA Air Quality Model (AQM) template."""
+
+import os
+import shutil
+import sys
+import tempfile
+from concurrent import futures
+from pathlib import Path
+
+import pytest
+import requests
+import xarray as xr
+
+from herbie import Herbie
+from herbie.models import aqm
+from herbie.models.aqm import (
+    _index_lock,
+    _indexpath,
+    _offset_for_record,
+    _open_dataset,
+)
+
+# A date after the latest AQM version cutover.
+DATE = "2025-04-15 12:00"
+
+
+class MockResponse:
+    """Stand-in for a `requests.Response`."""
+
+    def __init__(self, ok=True, headers=None, content=b""):
+        self.ok = ok
+        self.status_code = 200 if ok else 404
+        self.headers = headers or {}
+        self.content = content
+        self.text = content.decode(errors="replace")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def close(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+
+@pytest.fixture
+def heads(monkeypatch):
+    """Answer HEAD requests offline; returns the requested URLs."""
+    urls = []
+
+    def head(url, *args, **kwargs):
+        urls.append(url)
+        return MockResponse(headers={"Content-Length": "1000000", "ETag": '"abc"'})
+
+    monkeypatch.setattr(requests, "head", head)
+    aqm.clear_head_cache()
+    yield urls
+    aqm.clear_head_cache()
+
+
+@pytest.mark.parametrize(
+    "date, version",
+    [
+        ("2021-07-19 12:00", "v5"),
+        ("2021-07-20 12:00", "v6"),
+        ("2024-05-13 12:00", "v6"),
+        ("2024-05-14 12:00", "v7"),
+    ],
+)
+def test_aqm_version(heads, tmp_path, date, version):
+    """The AQM version is chosen by the initialization date."""
+    H = Herbie(date, model="aqm", product="ave_8hr_o3", save_dir=tmp_path)
+    assert H.version == version
+    assert f"/AQM{version}/CS/" in H.SOURCES["aws"]
+
+
+def test_aqm_default_product(heads, tmp_path):
+    """The first product is used when no product is given."""
+    H = Herbie(DATE, model="aqm", save_dir=tmp_path)
+    assert H.product == "ave_1hr_o3"
+    assert not H._is_max
+
+    H = Herbie(DATE, model="aqm", product="max_8hr_o3", save_dir=tmp_path)
+    assert H._is_max
+
+
+def test_aqm_head_cache(heads, tmp_path):
+    """All forecast hours of a cycle share one HEAD request for the GRIB file."""
+    for fxx in range(3):
+        H = Herbie(DATE, model="aqm", product="ave_8hr_o3", fxx=fxx, save_dir=tmp_path)
+    grib_heads = [url for url in heads if url.endswith(".grib2")]
+    assert grib_heads == [H.SOURCES["aws"]]
+    assert H.grib == H.SOURCES["aws"]
+
+    aqm.clear_head_cache()
+    Herbie(DATE, model="aqm", product="ave_8hr_o3", save_dir=tmp_path)
+    grib_heads = [url for url in heads if url.endswith(".grib2")]
+    assert len(grib_heads) == 2
+
+
+def test_aqm_head_cache_missing_file(monkeypatch, tmp_path):
+    """A file that isn't on AWS yet is checked again next time."""
+    urls = []
+
+    def head(url, *args, **kwargs):
+        urls.append(url)
+        return MockResponse(ok=False)
+
+    monkeypatch.setattr(requests, "head", head)
+    aqm.clear_head_cache()
+
+    for _ in range(2):
+        H = Herbie(DATE, model="aqm", product="ave_8hr_o3", save_dir=tmp_path)
+        assert H.grib is None
+    assert urls.count(H.SOURCES["aws"]) == 2
+    assert not aqm._head_cache
+
+
+# A GRIB file with two messages and its wgrib2-style index file.
+SAMPLE_GRIB = (
+    Path(__file__).parent.parent
+    / "sample_data/hrrr/20201214/subset_20201214_hrrr.t00z.wrfsfcf12.grib2"
+)
+SAMPLE_IDX = (
+    "1:0:d=2020121400:APCP:surface:0-12 hour acc fcst:\n"
+    "2:887244:d=2020121400:APCP:surface:11-12 hour acc fcst:\n"
+)
+
+
+@pytest.fixture
+def remote(heads, monkeypatch, tmp_path):
+    """Serve the sample GRIB file as an AQM file on AWS; returns the GET requests."""
+    monkeypatch.setattr(sys.modules["herbie.models.aqm"], "_CACHE_DIR", tmp_path)
+    data = SAMPLE_GRIB.read_bytes()
+    gets = []
+
+    def get(url, *args, headers=None, **kwargs):
+        gets.append((url, headers))
+        if url.endswith(".idx"):
+            return MockResponse(content=SAMPLE_IDX.encode())
+        start, end = headers["Range"].removeprefix("bytes=").split("-")
+        return MockResponse(content=data[int(start) : int(end) + 1 if end else None])
+
+    monkeypatch.setattr(requests, "get", get)
+    return gets
+
+
+def test_aqm_indexpath(monkeypatch, tmp_path, caplog):
+    """Each set of backend_kwargs and each download gets its own cfgrib index."""
+    monkeypatch.setattr(sys.modules["herbie.models.aqm"], "_CACHE_DIR", tmp_path)
+    local_file = tmp_path / "sample.grib2"
+    shutil.copy(SAMPLE_GRIB, local_file)
+    surface = {"filter_by_keys": {"typeOfLevel": "surface"}}
+
+    def open_twice(backend_kwargs):
+        backend_kwargs["indexpath"] = _indexpath(local_file, backend_kwargs)
+        for _ in range(2):
+            xr.open_dataset(local_file, engine="cfgrib", backend_kwargs=backend_kwargs)
+        return backend_kwargs["indexpath"]
+
+    indexpaths = [open_twice({**surface, "time_dims": []}), open_twice({**surface})]
+
+    # The file is downloaded again.
+    stat = local_file.stat()
+    os.utime(local_file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+    indexpaths.append(open_twice({**surface}))
+
+    assert len(set(indexpaths)) == 3
+    assert all("{short_hash}" in indexpath for indexpath in indexpaths)
+    assert len(list(tmp_path.glob("*.idx"))) == 3
+    assert "Ignoring index file" not in caplog.text
+
+
+def test_aqm_index_lock(tmp_path):
+    """Each index file is locked separately, and no lock files are left."""
+    pytest.importorskip("fcntl")
+    a = str(tmp_path / "a.{short_hash}.idx")
+    b = str(tmp_path / "b.{short_hash}.idx")
+
+    def hold(indexpath):
+        with _index_lock(indexpath):
+            return True
+
+    with futures.ThreadPoolExecutor(1) as exe:
+        with _index_lock(a):
+            assert exe.submit(hold, b).result(timeout=5)
+            same = exe.submit(hold, a)
+            with pytest.raises(futures.TimeoutError):
+                same.result(timeout=0.2)
+        assert same.result(timeout=5)
+
+    assert not list(tmp_path.glob("*.lock"))
+
+
+def test_aqm_open_dataset_threads(monkeypatch, tmp_path):
+    """The dataset cache can be used by many threads at once."""
+    aqm_module = sys.modules["herbie.models.aqm"]
+    monkeypatch.setattr(aqm_module, "_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(aqm_module, "_DS_CACHE", {})
+
+    local_files = []
+    for i in range(aqm_module._DS_CACHE_SIZE + 4):
+        local_files.append(tmp_path / f"sample{i}.grib2")
+        shutil.copy(SAMPLE_GRIB, local_files[-1])
+
+    def open_dataset(local_file):
+        backend_kwargs = {"filter_by_keys": {"typeOfLevel": "surface"}}
+        backend_kwargs["indexpath"] = _indexpath(local_file, backend_kwargs)
+        return _open_dataset(local_file, backend_kwargs)
+
+    with futures.ThreadPoolExecutor(8) as exe:
+        datasets = list(exe.map(open_dataset, local_files * 2))
+
+    assert all("tp" in ds for ds in datasets)
+    assert len(aqm_module._DS_CACHE) == aqm_module._DS_CACHE_SIZE
+
+
+@pytest.mark.parametrize(
+    "search, byte_range, mean",
+    [
+        (":0-12 hour", "bytes=0-887243", 1.6247036457061768),
+        (":11-12 hour", "bytes=887244-", 0.15209393203258514),
+    ],
+)
+def test_aqm_xarray_ranged(remote, tmp_path, search, byte_range, mean):
+    """Only the byte ranges of the requested messages are fetched."""
+    H = Herbie(DATE, model="aqm", product="max_8hr_o3", save_dir=tmp_path)
+    ds = aqm.xarray(H, search)
+
+    assert [headers["Range"] for _, headers in remote if headers] == [byte_range]
+    assert ds.tp.mean().item() == pytest.approx(mean)
+    assert not H.get_localFilePath(search).exists()
+
+
+def test_aqm_xarray_ranged_shm(remote, monkeypatch, tmp_path):
+    """The fetched messages are written to RAM (/dev/shm) and then removed."""
+    shm_dir = tmp_path / "shm"
+    shm_dir.mkdir()
+    monkeypatch.setattr(sys.modules["herbie.models.aqm"], "_SHM_DIR", shm_dir)
+    tmp_files = []
+    NamedTemporaryFile = tempfile.NamedTemporaryFile
+
+    def named_temporary_file(*args, **kwargs):
+        f = NamedTemporaryFile(*args, **kwargs)
+        tmp_files.append(Path(f.name))
+        return f
+
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", named_temporary_file)
+
+    H = Herbie(DATE, model="aqm", product="max_8hr_o3", save_dir=tmp_path)
+    ds = aqm.xarray(H, ":11-12 hour")
+
+    assert ds.tp.mean().item() == pytest.approx(0.15209393203258514)
+    assert [f.parent for f in tmp_files] == [shm_dir]
+    assert not list(shm_dir.iterdir())
+    assert not H.get_localFilePath(":11-12 hour").exists()
+
+
+def test_aqm_xarray_local_subset(remote, tmp_path):
+    """A subset that was already downloaded is opened instead of fetched again."""
+    H = Herbie(DATE, model="aqm", product="max_8hr_o3", save_dir=tmp_path)
+    local_file = H.get_localFilePath("APCP")
+    local_file.parent.mkdir(parents=True)
+    shutil.copy(SAMPLE_GRIB, local_file)
+
+    ds = aqm.xarray(H, "APCP")
+
+    assert not [headers for _, headers in remote if headers]
+    assert ds.tp.mean().item() == pytest.approx(1.6247036457061768)
+    assert local_file.exists()
+
+
+def test_aqm_read_cached(heads, monkeypatch, tmp_path):
+    """With aqm.USE_FILECACHE, byte ranges read again come from cache_dir."""
+    fsspec = pytest.importorskip("fsspec")
+    from fsspec.spec import AbstractBufferedFile
+
+    monkeypatch.setattr(sys.modules["herbie.models.aqm"], "_CACHE_DIR", tmp_path)
+    data = SAMPLE_GRIB.read_bytes()
+    fetches = []
+
+    class SampleFile(AbstractBufferedFile):
+        def _fetch_range(self, start, end):
+            fetches.append((start, end))
+            return data[start:end]
+
+    class SampleFileSystem(fsspec.AbstractFileSystem):
+        """Serve the sample GRIB file as a remote file."""
+
+        def info(self, path, **kwargs):
+            return {"name": path, "size": len(data), "type": "file"}
+
+        def _open(self, path, mode="rb", **kwargs):
+            return SampleFile(self, path, mode, **kwargs)
+
+    fsspec.register_implementation("herbie-test", SampleFileSystem, clobber=True)
+
+    H = Herbie(DATE, model="aqm", product="max_8hr_o3", save_dir=tmp_path)
+    H.grib = "herbie-test://aqm/sample.grib2"
+    ranges = [(0, 887243), (887244, None)]
+
+    assert aqm._read_cached(H, ranges) == [data[:887244], data[887244:]]
+    assert fetches
+
+    fetches.clear()
+    assert aqm._read_cached(H, ranges) == [data[:887244], data[887244:]]
+    assert not fetches
+    assert list((tmp_path / "blockcache").iterdir())
+
+
+def test_aqm_gather(heads, monkeypatch, tmp_path):
+    """Each AQM file is downloaded once and shared by all its Herbie objects."""
+    gets = []
+
+    def get(session, url, *args, **kwargs):
+        gets.append(url)
+        return MockResponse(content=url.encode())
+
+    monkeypatch.setattr(requests.Session, "get", get)
+
+    objects = [
+        Herbie(DATE, model="aqm", product=product, fxx=fxx, save_dir=tmp_path)
+        for product in ["ave_8hr_o3", "max_8hr_o3"]
+        for fxx in range(3)
+    ]
+    urls = [H.grib for H in objects]
+    local_files = aqm.gather(objects)
+
+    assert sorted(gets) == sorted(set(urls))
+    assert len(local_files) == 2
+    for H, url in zip(objects, urls):
+        assert H.grib == H.get_localFilePath()
+        assert H.grib.read_bytes() == url.encode()
+
+
+def test_aqm_gather_failed_download(heads, monkeypatch, tmp_path):
+    """A failed download doesn't leave a partial file behind."""
+
+    class BrokenResponse(MockResponse):
+        def iter_content(self, chunk_size=1):
+            yield b"GRIB"
+            raise requests.ConnectionError("Connection reset")
+
+    monkeypatch.setattr(
+        requests.Session, "get", lambda *args, **kwargs: BrokenResponse()
+    )
+    H = Herbie(DATE, model="aqm", product="ave_8hr_o3", save_dir=tmp_path)
+
+    with pytest.raises(requests.ConnectionError):
+        aqm.gather([H])
+    assert not list(H.get_localFilePath().parent.iterdir())
+
+
+def test_offset_for_record(tmp_path):
+    """The byte offset of a message is read from a wgrib2-style index file."""
+    idx_path = tmp_path / "sample.grib2.idx"
+    idx_path.write_text(f"\n{SAMPLE_IDX}\n")
+
+    assert _offset_for_record(idx_path, 1) == 0
+    assert _offset_for_record(idx_path, 2) == 887244
+    assert _offset_for_record(idx_path, 3) is None
+
+
+def test_aqm_load_specific_grib_record(remote, tmp_path):
+    """The remote index file is only used for the full local file."""
+    H = Herbie(DATE, model="aqm", product="max_8hr_o3", save_dir=tmp_path)
+    local_file = H.get_localFilePath()
+    local_file.parent.mkdir(parents=True)
+    shutil.copy(SAMPLE_GRIB, local_file)
+
+    ds = aqm._load_specific_grib_record(H, local_file, 2)
+    assert ds.tp.mean().item() == pytest.approx(0.15209393203258514)
+    ds = aqm._load_specific_grib_record(H, local_file, 1)
+    assert ds.tp.mean().item() == pytest.approx(1.6247036457061768)
+
+    # Herbie's index was downloaded once and reused.
+    assert [url for url, _ in remote] == [H.idx]
+
+    with pytest.raises(ValueError, match="GRIB message 3 is not in the index"):
+        aqm._load_specific_grib_record(H, local_file, 3)
+
+    subset_file = local_file.with_name(f"subset_{local_file.name}")
+    shutil.copy(SAMPLE_GRIB, subset_file)
+    with pytest.raises(ValueError, match="No index file"):
+        aqm._load_specific_grib_record(H, subset_file, 2)
+
+
+@pytest.mark.parametrize(
+    "product, variable, expected",
+    [
+        ("max_8hr_o3_bc", "OZMAX8", ("OZMAX8", "ppbV", "Maximum 8-hour ozone")),
+        ("max_1hr_o3", "OZMAX1", ("OZMAX1", "ppbV", "Maximum 1-hour ozone")),
+        ("ave_24hr_pm25_bc", "pmtf", ("pmtf", "µg/m³", "24-hour average PM2.5")),
+        # The 1-hour maximum isn't described as the 8-hour maximum.
+        ("max_8hr_o3", "OZMAX1", None),
+    ],
+)
+def test_aqm_post_process_dataset(heads, tmp_path, product, variable, expected):
+    """Variable metadata is added for the variable of the product."""
+    H = Herbie(DATE, model="aqm", product=product, save_dir=tmp_path)
+    ds = xr.Dataset({variable: ("x", [1.0, 2.0])})
+
+    ds = aqm._post_process_dataset(H, ds)
+
+    assert ds.attrs["product"] == product
+    if expected is None:
+        assert "variable" not in ds.attrs
+    else:
+        attrs = (ds.attrs["variable"], ds.attrs["units"], ds.attrs["description"])
+        assert attrs == expected
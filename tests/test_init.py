@@ -1,4 +1,6 @@
 import os
+import subprocess
+import sys
 
 import toml
 
@@ -29,3 +31,14 @@ def test_default_toml():
     a["default"]["fxx"] == 0
     a["default"]["overwrite"] == False
     a["default"]["verbose"] == True
+
+
+def test_import_does_not_load_cfgrib():
+    """cfgrib is slow to import, so it is only imported when reading data."""
+    p = subprocess.run(
+        [sys.executable, "-c", "import sys, herbie; print('cfgrib' in sys.modules)"],
+        capture_output=True,
+        encoding="utf-8",
+        check=True,
+    )
+    assert p.stdout.strip().splitlines()[-1] == "False"